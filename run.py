@@ -4,8 +4,7 @@ Entry point script for the LinkedIn Content Generator Agent.
 """
 
 import sys
-import asyncio
-from socialagent.cli import main
+from socialagent.cli import run
 
 if __name__ == "__main__":
-    asyncio.run(main(sys.argv[1:]))
+    run(sys.argv[1:])
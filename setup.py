@@ -3,11 +3,14 @@ from setuptools import setup, find_packages
 setup(
     name="socialagent",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(include=["socialagent", "socialagent.*"]),
     install_requires=[
         "semantic-kernel>=0.3.0",
         "openai>=1.0.0",
         "python-dotenv>=1.0.0",
+        "pydantic-settings>=2.0.0",
+        "uvloop>=0.19.0; sys_platform != 'win32'",
+        "httpx[http2]>=0.24.0",
     ],
     entry_points={
         "console_scripts": [
@@ -4,10 +4,20 @@ LinkedIn Content Generator Agent powered by Semantic Kernel
 
 import os
 from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-env_path = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / '.env'
-load_dotenv(dotenv_path=env_path)
 
 __version__ = "0.1.0"
+
+_env_loaded = False
+
+
+def ensure_env_loaded() -> None:
+    """Load environment variables from the .env file, once, on first use."""
+    global _env_loaded
+    if _env_loaded:
+        return
+
+    from dotenv import load_dotenv
+
+    env_path = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / '.env'
+    load_dotenv(dotenv_path=env_path)
+    _env_loaded = True
@@ -2,29 +2,356 @@
 LinkedIn Content Generator Agent
 """
 
-import os
-from typing import Dict, List, Optional
+import asyncio
+import json
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
 
+import httpx
+import openai
 import semantic_kernel as sk
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, OpenAIChatCompletion
+from semantic_kernel.connectors.ai.open_ai import (
+    AzureChatCompletion,
+    AzureTextEmbedding,
+    OpenAIChatCompletion,
+    OpenAITextEmbedding,
+)
+from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+from semantic_kernel.functions import KernelFunctionFromPrompt, KernelPlugin
 from semantic_kernel.functions.kernel_function import KernelFunction
-from semantic_kernel.functions.kernel_function_metadata import KernelFunctionMetadata
-from semantic_kernel.functions import KernelPlugin, KernelFunctionFromPrompt
 from semantic_kernel.functions.kernel_arguments import KernelArguments
 
+from socialagent.batch import run_chat_batch
+from socialagent.cache import LLMCache, cache_key
+from socialagent.config import get_settings
+
+# API version used for requests against Azure OpenAI (supports chat, embeddings and batch)
+AZURE_API_VERSION = "2024-10-21"
+
+
+# Number of times a failed request to the model service is retried
+MAX_RETRIES = 4
+
+# Marker the content prompts ask the model to end with; generation stops when it is produced
+STOP_SEQUENCE = "---END---"
+
+# Execution settings per function; the temperature is also part of the response cache key
+EXECUTION_SETTINGS: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    "generate_linkedin_post": MappingProxyType(
+        {"temperature": 0.7, "top_p": 1.0, "max_tokens": 1000, "stop": [STOP_SEQUENCE]}
+    ),
+    "generate_content_series": MappingProxyType(
+        {"temperature": 0.7, "top_p": 1.0, "max_tokens": 2000, "stop": [STOP_SEQUENCE]}
+    ),
+    "analyze_post": MappingProxyType(
+        {"temperature": 0.5, "top_p": 1.0, "max_tokens": 1500, "stop": [STOP_SEQUENCE]}
+    ),
+    "outline_content_series": MappingProxyType({"temperature": 0.0, "top_p": 1.0, "max_tokens": 200}),
+})
+
+# Token limit of a post by its requested length; other lengths use the function's limit
+POST_MAX_TOKENS: Mapping[str, int] = MappingProxyType({"short": 300, "medium": 600, "long": 1000})
+
+# Name of the plugin the content generation functions are registered in
+PLUGIN_NAME = "linkedin_content"
+
+# Opening shared by the content prompts. Keeping it byte-identical and first lets the service
+# reuse its cached prompt prefix across functions; the style is rendered from a variable
+SHARED_PREFIX = """
+You are an expert LinkedIn content creator, strategist and analyst who helps professionals craft
+engaging content that drives engagement and establishes thought leadership.
+
+Writing Style Guidelines:
+{{$personal_style}}
+
+When your response is complete, end it with """ + STOP_SEQUENCE + """ on its own line.
+"""
+
+# The free-text variable of each function that the semantic cache tier compares;
+# all other variables must match exactly for a cached result to be served. Functions
+# not listed are cached exactly only: a post edited by a word or two must be analyzed anew
+SEMANTIC_VARIABLES: Mapping[str, str] = MappingProxyType({
+    "generate_linkedin_post": "topic",
+    "generate_content_series": "main_topic",
+    "outline_content_series": "main_topic",
+})
+
+# Prompt values for the include_hashtags flag
+_HASHTAG_FLAGS = {True: "yes", False: "no"}
+
+
+def _compact_prompt(prompt: str) -> str:
+    """Strip the source indentation from a prompt so it is not rendered and sent on every call."""
+    return "\n".join(line.strip() for line in prompt.strip().splitlines())
+
+
+def _compact_style(style: str) -> str:
+    """Collapse the whitespace of a writing style, which is sent with every request, to single spaces and line breaks."""
+    lines = (" ".join(line.split()) for line in style.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+async def _discard(result: str) -> None:
+    """Store function used when the response cache is disabled."""
+
+
+@lru_cache(maxsize=128)
+def _call_settings(
+    service_id: str,
+    use_azure: bool,
+    function_name: str,
+    session_id: Optional[str],
+    max_tokens: Optional[int]
+) -> PromptExecutionSettings:
+    """
+    Return the execution settings of a function for calls that override its defaults.
+
+    The settings are built once per combination and reused by later calls, like the
+    settings registered with each function.
+    """
+    settings = dict(EXECUTION_SETTINGS[function_name])
+    if max_tokens is not None:
+        settings["max_tokens"] = max_tokens
+
+    # Azure OpenAI routes on the end-user identifier, OpenAI on an explicit prompt cache key
+    if session_id is not None:
+        if use_azure:
+            settings["user"] = session_id
+        else:
+            settings["extra_body"] = {"prompt_cache_key": session_id}
+
+    return PromptExecutionSettings(service_id=service_id, **settings)
+
+
+async def _stream_headlines(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Yield the headlines of a streamed series outline as soon as each one is complete.
+
+    The outline is expected to be a JSON array of strings. Text before the opening
+    bracket (such as a code fence) is skipped, and parsing stops at the first element
+    that is not a string. The stream is always consumed to the end.
+
+    Args:
+        chunks (AsyncIterator[str]): The outline as it is generated.
+
+    Yields:
+        str: Each non-empty headline, stripped of surrounding whitespace.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    # Index of the next unparsed element, once the opening bracket has arrived
+    position = None
+    async for chunk in chunks:
+        buffer += chunk
+        if position is None:
+            start = buffer.find("[")
+            if start < 0:
+                continue
+            position = start + 1
+
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer) or buffer[position] != '"':
+                break
+            try:
+                headline, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The string is not complete yet
+                break
+            if headline.strip():
+                yield headline.strip()
+
+
+def _create_clients(
+    use_azure: bool, api_key: str, azure_endpoint: Optional[str]
+) -> Tuple[httpx.AsyncClient, openai.AsyncOpenAI]:
+    """
+    Create the HTTP client and OpenAI client used by an agent's services.
+
+    Args:
+        use_azure (bool): Whether to create an Azure OpenAI or a direct OpenAI client.
+        api_key (str): The API key.
+        azure_endpoint (Optional[str]): The Azure OpenAI endpoint URL.
+
+    Returns:
+        Tuple[httpx.AsyncClient, openai.AsyncOpenAI]: The HTTP client and the OpenAI client using it.
+    """
+    # Share one pooled HTTP/2 client between all services so concurrent requests
+    # multiplex over a few warm connections instead of opening one each. The transport
+    # retries failed connection attempts; the OpenAI client retries rate-limited (429),
+    # server-error and timed-out requests with exponential backoff, honoring Retry-After.
+    # Non-streamed completions send nothing until they are done, so reads keep the OpenAI
+    # client's long default timeout; only connecting is expected to be quick.
+    http_client = httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            retries=3
+        ),
+        timeout=httpx.Timeout(600.0, connect=5.0)
+    )
+    if use_azure:
+        openai_client: openai.AsyncOpenAI = openai.AsyncAzureOpenAI(
+            api_key=api_key,
+            azure_endpoint=azure_endpoint,
+            api_version=AZURE_API_VERSION,
+            max_retries=MAX_RETRIES,
+            http_client=http_client
+        )
+    else:
+        openai_client = openai.AsyncOpenAI(
+            api_key=api_key,
+            max_retries=MAX_RETRIES,
+            http_client=http_client
+        )
+
+    return http_client, openai_client
+
+
+def _result_text(result) -> str:
+    """Return the text of a function result, reading the chat message directly when possible."""
+    value = getattr(result, "value", None)
+    if isinstance(value, list) and value and isinstance(getattr(value[0], "content", None), str):
+        return value[0].content
+    return str(result)
+
 
 class LinkedInContentAgent:
     """
     A Semantic Kernel agent that generates LinkedIn content based on user input.
     """
 
+    # Agents shared through get_shared, keyed by their constructor arguments
+    _shared_instances: Dict[Tuple, "LinkedInContentAgent"] = {}
+
+    # HTTP and OpenAI clients shared by agents that use the same service and credentials,
+    # and the number of open agents using each. The clients are bound to the event loop they
+    # are first used in, so agents that share them must run in the same loop
+    _shared_clients: Dict[Tuple, Tuple[httpx.AsyncClient, openai.AsyncOpenAI]] = {}
+    _client_users: Dict[Tuple, int] = {}
+
+    # Description and prompt template of each function. The templates are compacted once when
+    # the class is loaded and shared by all agents; the writing style is rendered from a variable
+    _PROMPTS: Mapping[str, Tuple[str, str]] = MappingProxyType({
+        "generate_linkedin_post": (
+            "Generates a professional LinkedIn post about a specific topic.",
+            _compact_prompt(SHARED_PREFIX + """
+            Task: create a professional LinkedIn post about the topic given at the end of these instructions,
+            for the target audience, tone and length given there.
+
+            The post should be well-structured, professional, and engage the target audience effectively.
+            If hashtags are requested, include 3-5 relevant hashtags at the end of the post.
+
+            --- END OF INSTRUCTIONS ---
+
+            Topic: {{$topic}}
+            Target audience: {{$audience}}
+            Tone: {{$tone}}
+            Include hashtags: {{$include_hashtags}}
+            Post length: {{$length}}
+            """)
+        ),
+        "generate_content_series": (
+            "Generates a series of LinkedIn post ideas based on a main topic.",
+            _compact_prompt(SHARED_PREFIX + """
+            Task: create a content series plan with the number of LinkedIn posts, main topic, target audience
+            and content goal given at the end of these instructions.
+
+            For each post in the series, provide:
+            1. A catchy headline
+            2. The main points to cover (3-5 bullet points)
+            3. A suggested call-to-action
+            4. 3-5 relevant hashtags
+
+            Make sure the series has a logical flow, with each post building on previous ones while still being valuable as standalone content.
+
+            --- END OF INSTRUCTIONS ---
+
+            Number of posts: {{$number_of_posts}}
+            Main topic: {{$main_topic}}
+            Target audience: {{$audience}}
+            Content goal: {{$content_goal}}
+            """)
+        ),
+        "analyze_post": (
+            "Analyzes a LinkedIn post and provides feedback for improvement.",
+            _compact_prompt(SHARED_PREFIX + """
+            Task: analyze the LinkedIn post given at the end of these instructions and provide detailed feedback
+            for better engagement and impact.
+
+            In your analysis, cover:
+            1. Overall impression and impact
+            2. Clarity and structure of the message
+            3. Engagement potential
+            4. Use of hashtags (if any)
+            5. Call-to-action effectiveness
+            6. Specific suggestions for improvement
+
+            Be constructive and specific in your feedback, highlighting both strengths and areas for improvement.
+            Also provide an example of how to improve the post based on your feedback, maintaining the original topic and intent but enhancing the style and engagement.
+
+            --- END OF INSTRUCTIONS ---
+
+            POST:
+            {{$post_content}}
+            """)
+        ),
+        "outline_content_series": (
+            "Outlines a LinkedIn content series as a list of post headlines.",
+            _compact_prompt("""
+            You are an expert LinkedIn content strategist.
+
+            Outline a LinkedIn content series with the number of posts, main topic, target audience
+            and content goal given at the end of these instructions. Give one catchy headline per post,
+            in an order where each post builds on the previous ones.
+
+            Respond with a JSON array of headline strings only, without any other text.
+
+            --- END OF INSTRUCTIONS ---
+
+            Number of posts: {{$number_of_posts}}
+            Main topic: {{$main_topic}}
+            Target audience: {{$audience}}
+            Content goal: {{$content_goal}}
+            """)
+        ),
+    })
+
+    # Prompt of one post of a content series planned through the Batch API
+    _SERIES_POST_BATCH_PROMPT = _compact_prompt(SHARED_PREFIX + """
+        Task: plan one post of a LinkedIn content series, using the position in the series, main topic,
+        target audience and content goal given at the end of these instructions.
+
+        For this post, provide:
+        1. A catchy headline
+        2. The main points to cover (3-5 bullet points)
+        3. A suggested call-to-action
+        4. 3-5 relevant hashtags
+
+        The post should fit its position in the series, building on the earlier posts while still
+        being valuable as standalone content.
+
+        --- END OF INSTRUCTIONS ---
+
+        Position in the series: post {{$index}} of {{$number_of_posts}}
+        Main topic: {{$main_topic}}
+        Target audience: {{$audience}}
+        Content goal: {{$content_goal}}
+        """)
+
     def __init__(self, 
                  api_key: Optional[str] = None, 
                  model_id: Optional[str] = None,
                  use_azure: bool = True,
                  azure_endpoint: Optional[str] = None,
                  azure_deployment: Optional[str] = None,
-                 personal_style: Optional[str] = None):
+                 personal_style: Optional[str] = None,
+                 cache: Optional[LLMCache] = None,
+                 embedding_deployment: Optional[str] = None,
+                 max_concurrency: Optional[int] = None,
+                 enable_cache: bool = True):
         """
         Initialize the LinkedIn Content Agent.
 
@@ -36,9 +363,17 @@ class LinkedInContentAgent:
             azure_deployment (Optional[str]): Azure OpenAI deployment name.
             personal_style (Optional[str]): Your personal writing style preferences. If provided,
                                             this will override the default style guidelines.
+            cache (Optional[LLMCache]): Response cache to use. If not provided, an in-memory cache is created.
+            embedding_deployment (Optional[str]): Embedding model or deployment used for the semantic cache tier.
+                                                  If not provided, will try to use environment variable; the
+                                                  semantic tier is disabled when neither is set.
+            max_concurrency (Optional[int]): Maximum number of concurrent requests to the model service.
+                                             If not provided, will try to use environment variable,
+                                             and defaults to 5.
+            enable_cache (bool): Whether to serve repeated requests from the response cache.
         """
-        # Store personal style preferences
-        self.personal_style = personal_style or """
+        # Store personal style preferences, compacted since they are rendered into every prompt
+        self.personal_style = _compact_style(personal_style or """
         - Write in a concise, clear, and direct style
         - Use a conversational and approachable tone that still maintains professionalism
         - Include occasional personal anecdotes or experiences when relevant
@@ -49,34 +384,55 @@ class LinkedInContentAgent:
         - Avoid jargon unless necessary for the target audience
         - Use a mix of short and medium-length sentences for rhythm
         - End with a clear call to action or thought-provoking question
-        """
+        """)
         # Get configuration from environment if not provided
+        settings = get_settings()
         if api_key is None:
-            api_key = os.environ.get("AZURE_OPENAI_API_KEY" if use_azure else "OPENAI_API_KEY")
-            # Strip any quotes that might be in the environment variable
-            if api_key and (api_key.startswith('"') and api_key.endswith('"') or 
-                           api_key.startswith("'") and api_key.endswith("'")):
-                api_key = api_key[1:-1]
-                
+            secret = settings.azure_openai_api_key if use_azure else settings.openai_api_key
+            api_key = secret.get_secret_value() if secret is not None else None
             if api_key is None:
                 raise ValueError(
                     f"{'Azure OpenAI' if use_azure else 'OpenAI'} API key is required. "
                     f"Either pass it directly or set the {'AZURE_OPENAI_API_KEY' if use_azure else 'OPENAI_API_KEY'} environment variable."
                 )
         
+        if max_concurrency is None:
+            max_concurrency = settings.socialagent_max_concurrency
+            if max_concurrency is None:
+                max_concurrency = 5
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+
         if model_id is None:
-            model_id = os.environ.get("AZURE_OPENAI_MODEL" if use_azure else "OPENAI_MODEL", "gpt-4")
+            model_id = (settings.azure_openai_model if use_azure else settings.openai_model) or "gpt-4"
         
         if use_azure:
             if azure_endpoint is None:
-                azure_endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT")
+                azure_endpoint = settings.azure_openai_endpoint
                 if azure_endpoint is None:
                     raise ValueError(
                         "Azure OpenAI endpoint URL is required. Either pass it directly or set the AZURE_OPENAI_ENDPOINT environment variable."
                     )
             
             if azure_deployment is None:
-                azure_deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", model_id)
+                azure_deployment = settings.azure_openai_deployment or model_id
+
+        if embedding_deployment is None:
+            embedding_deployment = (
+                settings.azure_openai_embedding_deployment if use_azure else settings.openai_embedding_model
+            )
+
+        self.model_id = azure_deployment if use_azure else model_id
+
+        self.use_azure = use_azure
+
+        # Reuse the HTTP connections of other agents that talk to the same service
+        self._client_key: Optional[Tuple] = (use_azure, azure_endpoint, api_key)
+        clients = self._shared_clients.get(self._client_key)
+        if clients is None:
+            clients = self._shared_clients[self._client_key] = _create_clients(use_azure, api_key, azure_endpoint)
+        self._http_client, self._openai_client = clients
+        self._client_users[self._client_key] = self._client_users.get(self._client_key, 0) + 1
 
         # Initialize the kernel
         self.kernel = sk.Kernel()
@@ -88,7 +444,8 @@ class LinkedInContentAgent:
                     service_id="azure_openai",
                     deployment_name=azure_deployment,
                     endpoint=azure_endpoint,
-                    api_key=api_key
+                    api_key=api_key,
+                    async_client=self._openai_client
                 )
             )
             self.service_id = "azure_openai"
@@ -97,129 +454,117 @@ class LinkedInContentAgent:
                 OpenAIChatCompletion(
                     service_id="openai", 
                     ai_model_id=model_id, 
-                    api_key=api_key
+                    api_key=api_key,
+                    async_client=self._openai_client
                 )
             )
             self.service_id = "openai"
-        
-        # Register the content generation functions
-        self._register_functions()
 
-    def _register_functions(self):
-        """Register semantic functions for content generation."""
-        # Plugin name for all LinkedIn functions
-        plugin_name = "linkedin_content"
-        
-        # Create a function for generating LinkedIn post content
-        linkedin_post_prompt = f"""
-        You are an expert LinkedIn content creator who helps professionals craft engaging posts
-        that drive engagement and establish thought leadership.
-        
-        Create a professional LinkedIn post about the following topic: {{{{$topic}}}}
-        
-        Target audience: {{{{$audience}}}}
-        Tone: {{{{$tone}}}}
-        Include hashtags: {{{{$include_hashtags}}}}
-        Post length: {{{{$length}}}}
-        
-        Writing Style Guidelines:
-        {self.personal_style}
+        # Add an embedding service for the semantic cache tier, if configured
+        embedder = None
+        if embedding_deployment:
+            if use_azure:
+                embedding_service = AzureTextEmbedding(
+                    service_id="azure_openai_embedding",
+                    deployment_name=embedding_deployment,
+                    endpoint=azure_endpoint,
+                    api_key=api_key,
+                    async_client=self._openai_client
+                )
+            else:
+                embedding_service = OpenAITextEmbedding(
+                    service_id="openai_embedding",
+                    ai_model_id=embedding_deployment,
+                    api_key=api_key,
+                    async_client=self._openai_client
+                )
+            self.kernel.add_service(embedding_service)
+
+            async def embedder(text: str) -> List[float]:
+                embeddings = await embedding_service.generate_embeddings([text])
+                return list(embeddings[0])
+
+        self._cache: Optional[LLMCache] = None
+        if enable_cache:
+            self._cache = cache if cache is not None else LLMCache(embedder=embedder)
+
+        # Bound concurrent requests; the semaphore is created lazily inside the running event loop
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
         
-        The post should be well-structured, professional, and engage the target audience effectively.
-        If hashtags are requested, include 3-5 relevant hashtags at the end of the post.
+        # Register the plugin for the content generation functions; each function is
+        # created and added to it the first time it is used
+        self._plugin = self.kernel.add_plugin(KernelPlugin(name=PLUGIN_NAME))
+
+    @classmethod
+    def get_shared(cls, **kwargs) -> "LinkedInContentAgent":
         """
-        
-        # Add the function directly to the kernel
-        self.kernel.add_function(
-            function_name="generate_linkedin_post",
-            plugin_name=plugin_name,
-            description="Generates a professional LinkedIn post about a specific topic.",
-            prompt=linkedin_post_prompt,
-            prompt_execution_settings={
-                self.service_id: {
-                    "temperature": 0.7,
-                    "top_p": 1.0,
-                    "max_tokens": 1000
-                }
-            }
-        )
-        
-        # Create a function for generating a content series plan
-        series_prompt = f"""
-        You are an expert LinkedIn content strategist who helps professionals plan engaging content series
-        that establish thought leadership and provide value to their network.
-        
-        Create a content series plan of {{{{$number_of_posts}}}} LinkedIn posts around the main topic: {{{{$main_topic}}}}
-        
-        Target audience: {{{{$audience}}}}
-        Content goal: {{{{$content_goal}}}}
-        
-        Writing Style Guidelines:
-        {self.personal_style}
-        
-        For each post in the series, provide:
-        1. A catchy headline
-        2. The main points to cover (3-5 bullet points)
-        3. A suggested call-to-action
-        4. 3-5 relevant hashtags
-        
-        Make sure the series has a logical flow, with each post building on previous ones while still being valuable as standalone content.
+        Return an agent shared by all callers that use the same configuration.
+
+        The first call constructs the agent; later calls with the same keyword arguments
+        reuse its kernel, registered functions, response cache and service connections, until
+        the agent is closed with aclose().
+
+        The shared agent's connections are bound to the event loop they are first used in, so
+        use get_shared only within a single event loop (e.g. one asyncio.run) and close the
+        agent before that loop ends.
+
+        Args:
+            **kwargs: Keyword arguments for the constructor.
+
+        Returns:
+            LinkedInContentAgent: The shared agent for this configuration.
         """
-        
-        # Add the function directly to the kernel
-        self.kernel.add_function(
-            function_name="generate_content_series",
-            plugin_name=plugin_name,
-            description="Generates a series of LinkedIn post ideas based on a main topic.",
-            prompt=series_prompt,
-            prompt_execution_settings={
-                self.service_id: {
-                    "temperature": 0.7,
-                    "top_p": 1.0,
-                    "max_tokens": 2000
-                }
-            }
-        )
-        
-        # Create a function for analyzing post performance
-        analyze_prompt = f"""
-        You are an expert LinkedIn content analyst who helps professionals improve their posts
-        for better engagement and impact.
-        
-        Analyze the following LinkedIn post and provide detailed feedback:
-        
-        POST:
-        {{{{$post_content}}}}
-        
-        Writing Style Guidelines:
-        {self.personal_style}
-        
-        In your analysis, cover:
-        1. Overall impression and impact
-        2. Clarity and structure of the message
-        3. Engagement potential
-        4. Use of hashtags (if any)
-        5. Call-to-action effectiveness
-        6. Specific suggestions for improvement
-        
-        Be constructive and specific in your feedback, highlighting both strengths and areas for improvement.
-        Also provide an example of how to improve the post based on your feedback, maintaining the original topic and intent but enhancing the style and engagement.
+        key = tuple(sorted(kwargs.items()))
+        agent = cls._shared_instances.get(key)
+        if agent is None:
+            agent = cls._shared_instances[key] = cls(**kwargs)
+        return agent
+
+    @property
+    def _fn_post(self) -> KernelFunction:
+        """The registered function for generating LinkedIn posts."""
+        return self._function("generate_linkedin_post")
+
+    @property
+    def _fn_series(self) -> KernelFunction:
+        """The registered function for generating content series plans."""
+        return self._function("generate_content_series")
+
+    @property
+    def _fn_analyze(self) -> KernelFunction:
+        """The registered function for analyzing posts."""
+        return self._function("analyze_post")
+
+    @property
+    def _fn_outline(self) -> KernelFunction:
+        """The registered function for outlining content series."""
+        return self._function("outline_content_series")
+
+    def _function(self, name: str) -> KernelFunction:
         """
-        
-        # Add the function directly to the kernel
-        self.kernel.add_function(
-            function_name="analyze_post",
-            plugin_name=plugin_name,
-            description="Analyzes a LinkedIn post and provides feedback for improvement.",
-            prompt=analyze_prompt,
-            prompt_execution_settings={
-                self.service_id: {
-                    "temperature": 0.5,
-                    "top_p": 1.0,
-                    "max_tokens": 1500
-                }
-            }
-        )
+        Return a registered function, creating and registering it on first use.
+
+        Args:
+            name (str): The name of the function.
+
+        Returns:
+            KernelFunction: The function as registered with the kernel.
+        """
+        function = self._plugin.functions.get(name)
+        if function is None:
+            description, prompt = self._PROMPTS[name]
+            self._plugin[name] = KernelFunctionFromPrompt(
+                function_name=name,
+                plugin_name=PLUGIN_NAME,
+                description=description,
+                prompt=prompt,
+                prompt_execution_settings=PromptExecutionSettings(
+                    service_id=self.service_id, **EXECUTION_SETTINGS[name]
+                )
+            )
+            function = self._plugin[name]
+        return function
 
     async def generate_linkedin_post(
         self, 
@@ -227,7 +572,8 @@ class LinkedInContentAgent:
         audience: str = "professionals", 
         tone: str = "professional",
         include_hashtags: bool = True,
-        length: str = "medium"
+        length: str = "medium",
+        session_id: Optional[str] = None
     ) -> str:
         """
         Generate a LinkedIn post about a specific topic.
@@ -238,33 +584,69 @@ class LinkedInContentAgent:
             tone (str): The tone of the post (professional, conversational, inspirational, etc.).
             include_hashtags (bool): Whether to include hashtags at the end of the post.
             length (str): The desired length of the post (short, medium, long).
+            session_id (Optional[str]): A stable identifier of the calling user or session. Requests
+                                        with the same identifier are routed to the same backend,
+                                        which improves the service's prompt cache hit rate.
             
         Returns:
             str: The generated LinkedIn post.
         """
-        # Get the LinkedIn post generation function
-        linkedin_plugin = self.kernel.get_plugin("linkedin_content")
-        generate_post = linkedin_plugin["generate_linkedin_post"]
-        
         # Set the arguments for the function
-        arguments = KernelArguments(
+        arguments = self._arguments(
+            "generate_linkedin_post",
+            session_id,
+            max_tokens=POST_MAX_TOKENS.get(length),
             topic=topic,
             audience=audience,
             tone=tone,
-            include_hashtags="yes" if include_hashtags else "no",
+            include_hashtags=_HASHTAG_FLAGS[bool(include_hashtags)],
             length=length
         )
         
-        # Invoke the function
-        result = await self.kernel.invoke(generate_post, arguments=arguments)
-        return str(result)
+        # Invoke the function, or serve the result from the cache
+        return await self._invoke_cached(self._fn_post, arguments)
+
+    async def generate_linkedin_post_stream(
+        self,
+        topic: str,
+        audience: str = "professionals",
+        tone: str = "professional",
+        include_hashtags: bool = True,
+        length: str = "medium",
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate a LinkedIn post about a specific topic, yielding it as it is generated.
+
+        Takes the same arguments as generate_linkedin_post.
+
+        Yields:
+            str: Chunks of the generated LinkedIn post.
+        """
+        # Set the arguments for the function
+        arguments = self._arguments(
+            "generate_linkedin_post",
+            session_id,
+            max_tokens=POST_MAX_TOKENS.get(length),
+            topic=topic,
+            audience=audience,
+            tone=tone,
+            include_hashtags=_HASHTAG_FLAGS[bool(include_hashtags)],
+            length=length
+        )
+
+        # Stream the function, or serve the result from the cache
+        async for chunk in self._invoke_stream_cached(self._fn_post, arguments):
+            yield chunk
 
     async def generate_content_series(
         self, 
         main_topic: str, 
         number_of_posts: int = 5,
         audience: str = "professionals",
-        content_goal: str = "establish thought leadership"
+        content_goal: str = "establish thought leadership",
+        use_batch_api: bool = False,
+        session_id: Optional[str] = None
     ) -> str:
         """
         Generate a series of LinkedIn post ideas based on a main topic.
@@ -274,45 +656,485 @@ class LinkedInContentAgent:
             number_of_posts (int): The number of posts to include in the series.
             audience (str): The target audience for the posts.
             content_goal (str): The goal of the content series.
+            use_batch_api (bool): Whether to submit one request per post through the Batch API.
+                                  This halves the token cost, but results can take up to 24 hours.
+            session_id (Optional[str]): A stable identifier of the calling user or session, see
+                                        generate_linkedin_post.
             
         Returns:
             str: The generated content series plan.
         """
-        # Get the content series generation function
-        linkedin_plugin = self.kernel.get_plugin("linkedin_content")
-        generate_series = linkedin_plugin["generate_content_series"]
-        
+        if number_of_posts < 1:
+            raise ValueError("A content series needs at least one post.")
+
+        if use_batch_api:
+            return await self._generate_content_series_batch(
+                main_topic, number_of_posts, audience, content_goal
+            )
+
         # Set the arguments for the function
-        arguments = KernelArguments(
+        arguments = self._arguments(
+            "generate_content_series",
+            session_id,
             main_topic=main_topic,
             number_of_posts=str(number_of_posts),
             audience=audience,
             content_goal=content_goal
         )
         
-        # Invoke the function
-        result = await self.kernel.invoke(generate_series, arguments=arguments)
-        return str(result)
+        # Invoke the function, or serve the result from the cache
+        return await self._invoke_cached(self._fn_series, arguments)
 
-    async def analyze_post(self, post_content: str) -> str:
+    async def generate_content_series_parallel(
+        self,
+        main_topic: str,
+        number_of_posts: int = 5,
+        audience: str = "professionals",
+        content_goal: str = "establish thought leadership",
+        tone: str = "professional",
+        session_id: Optional[str] = None
+    ) -> str:
+        """
+        Generate a content series as finished posts, writing the posts concurrently.
+
+        A short outline request first produces one headline per post. The outline is
+        streamed, and a post is generated for each headline as soon as it has arrived, so
+        the posts are written in parallel with each other and with the rest of the outline.
+        If the outline cannot be parsed, the series plan of generate_content_series is
+        returned instead.
+
+        Args:
+            main_topic (str): The main topic for the content series.
+            number_of_posts (int): The number of posts to include in the series.
+            audience (str): The target audience for the posts.
+            content_goal (str): The goal of the content series.
+            tone (str): The tone of the posts.
+            session_id (Optional[str]): A stable identifier of the calling user or session, see
+                                        generate_linkedin_post.
+
+        Returns:
+            str: The posts of the series, each under its headline.
+        """
+        if number_of_posts < 1:
+            raise ValueError("A content series needs at least one post.")
+
+        # Outline the series
+        arguments = self._arguments(
+            "outline_content_series",
+            session_id,
+            main_topic=main_topic,
+            number_of_posts=str(number_of_posts),
+            audience=audience,
+            content_goal=content_goal
+        )
+        outline = self._invoke_stream_cached(self._fn_outline, arguments)
+
+        # Start writing each post as soon as its headline has been streamed. Headlines beyond
+        # the requested number are not written; the rest of the outline is still read, so it
+        # is complete when it is cached
+        headlines = []
+        posts = []
+        try:
+            async for headline in _stream_headlines(outline):
+                if len(headlines) == number_of_posts:
+                    continue
+                headlines.append(headline)
+                posts.append(asyncio.ensure_future(self.generate_linkedin_post(
+                    topic=f"{headline} (post {len(headlines)} of a series on {main_topic})",
+                    audience=audience,
+                    tone=tone,
+                    session_id=session_id
+                )))
+        except BaseException:
+            for post in posts:
+                post.cancel()
+            raise
+
+        if not headlines:
+            return await self.generate_content_series(
+                main_topic=main_topic,
+                number_of_posts=number_of_posts,
+                audience=audience,
+                content_goal=content_goal,
+                session_id=session_id
+            )
+
+        posts = await self.gather(*posts)
+
+        return "\n\n".join(
+            f"Post {index}: {headline}\n{post}"
+            for index, (headline, post) in enumerate(zip(headlines, posts), start=1)
+        )
+
+    async def analyze_post(self, post_content: str, session_id: Optional[str] = None) -> str:
         """
         Analyze a LinkedIn post and provide feedback for improvement.
         
         Args:
             post_content (str): The content of the LinkedIn post to analyze.
+            session_id (Optional[str]): A stable identifier of the calling user or session, see
+                                        generate_linkedin_post.
             
         Returns:
             str: Analysis and feedback for the post.
         """
-        # Get the post analysis function
-        linkedin_plugin = self.kernel.get_plugin("linkedin_content")
-        analyze_post = linkedin_plugin["analyze_post"]
-        
         # Set the arguments for the function
-        arguments = KernelArguments(
+        arguments = self._arguments(
+            "analyze_post",
+            session_id,
             post_content=post_content
         )
         
-        # Invoke the function
-        result = await self.kernel.invoke(analyze_post, arguments=arguments)
-        return str(result)
+        # Invoke the function, or serve the result from the cache
+        return await self._invoke_cached(self._fn_analyze, arguments)
+
+    async def analyze_post_stream(
+        self, post_content: str, session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Analyze a LinkedIn post, yielding the analysis as it is generated.
+
+        Takes the same arguments as analyze_post.
+
+        Yields:
+            str: Chunks of the analysis and feedback for the post.
+        """
+        # Set the arguments for the function
+        arguments = self._arguments(
+            "analyze_post",
+            session_id,
+            post_content=post_content
+        )
+
+        # Stream the function, or serve the result from the cache
+        async for chunk in self._invoke_stream_cached(self._fn_analyze, arguments):
+            yield chunk
+
+    async def _generate_content_series_batch(
+        self,
+        main_topic: str,
+        number_of_posts: int,
+        audience: str,
+        content_goal: str
+    ) -> str:
+        """Generate a content series through the Batch API, one request per post."""
+        settings = EXECUTION_SETTINGS["generate_content_series"]
+        requests = {}
+        for index in range(1, number_of_posts + 1):
+            prompt = self._render_prompt(self._SERIES_POST_BATCH_PROMPT, {
+                "index": str(index),
+                "number_of_posts": str(number_of_posts),
+                "main_topic": main_topic,
+                "audience": audience,
+                "content_goal": content_goal,
+                "personal_style": self.personal_style
+            })
+            requests[f"post_{index}"] = {
+                "model": self.model_id,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": settings["temperature"],
+                "top_p": settings["top_p"],
+                "max_tokens": settings["max_tokens"],
+                "stop": settings["stop"]
+            }
+
+        results = await self._run_batch(requests)
+
+        return "\n\n".join(
+            f"Post {index}:\n{results[f'post_{index}']}" for index in range(1, number_of_posts + 1)
+        )
+
+    async def generate_linkedin_posts_batch(
+        self,
+        topics: List[str],
+        audience: str = "professionals",
+        tone: str = "professional",
+        include_hashtags: bool = True,
+        length: str = "medium"
+    ) -> List[str]:
+        """
+        Generate a LinkedIn post for each topic through the Batch API.
+
+        The posts are generated from the same prompt and settings as generate_linkedin_post,
+        at half the token cost, but results can take up to 24 hours.
+
+        Args:
+            topics (List[str]): The topics to write posts about.
+            audience (str): The target audience for the posts.
+            tone (str): The tone of the posts.
+            include_hashtags (bool): Whether to include hashtags at the end of the posts.
+            length (str): The desired length of the posts (short, medium, long).
+
+        Returns:
+            List[str]: The generated post for each topic, in order.
+        """
+        if not topics:
+            return []
+
+        settings = EXECUTION_SETTINGS["generate_linkedin_post"]
+        requests = {}
+        for index, topic in enumerate(topics):
+            prompt = self._render_prompt(self._PROMPTS["generate_linkedin_post"][1], {
+                "topic": topic,
+                "audience": audience,
+                "tone": tone,
+                "include_hashtags": _HASHTAG_FLAGS[bool(include_hashtags)],
+                "length": length,
+                "personal_style": self.personal_style
+            })
+            requests[f"post_{index}"] = {
+                "model": self.model_id,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": settings["temperature"],
+                "top_p": settings["top_p"],
+                "max_tokens": POST_MAX_TOKENS.get(length, settings["max_tokens"]),
+                "stop": settings["stop"]
+            }
+
+        results = await self._run_batch(requests)
+        return [results[f"post_{index}"] for index in range(len(topics))]
+
+    async def generate_and_analyze(
+        self,
+        topics: List[str],
+        audience: str = "professionals",
+        tone: str = "professional",
+        include_hashtags: bool = True,
+        length: str = "medium",
+        session_id: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        Generate a LinkedIn post for each topic and analyze it.
+
+        Each topic runs its own generate-then-analyze pipeline, and the pipelines run
+        concurrently, so the total time is that of the slowest topic rather than the sum.
+
+        Args:
+            topics (List[str]): The topics to write posts about.
+            audience (str): The target audience for the posts.
+            tone (str): The tone of the posts.
+            include_hashtags (bool): Whether to include hashtags at the end of the posts.
+            length (str): The desired length of the posts (short, medium, long).
+            session_id (Optional[str]): A stable identifier of the calling user or session, see
+                                        generate_linkedin_post.
+
+        Returns:
+            List[Tuple[str, str]]: A (post, analysis) pair for each topic, in order.
+        """
+        async def pipeline(topic: str) -> Tuple[str, str]:
+            post = await self.generate_linkedin_post(
+                topic=topic,
+                audience=audience,
+                tone=tone,
+                include_hashtags=include_hashtags,
+                length=length,
+                session_id=session_id
+            )
+            analysis = await self.analyze_post(post_content=post, session_id=session_id)
+            return post, analysis
+
+        return await self.gather(*(pipeline(topic) for topic in topics))
+
+    async def gather(self, *calls: Awaitable) -> list:
+        """
+        Run independent agent calls concurrently.
+
+        Requests to the model service are bounded by max_concurrency, so any number of
+        calls can be passed without exceeding the service's rate limits. If a call fails,
+        the calls still running are cancelled and the exception is raised.
+
+        Args:
+            *calls (Awaitable): The agent calls to run, e.g. agent.generate_linkedin_post(...).
+
+        Returns:
+            list: The results of the calls, in order.
+        """
+        tasks = [asyncio.ensure_future(call) for call in calls]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # Results of the other calls would be discarded, so stop spending tokens on them
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def _arguments(
+        self,
+        function_name: str,
+        session_id: Optional[str],
+        max_tokens: Optional[int] = None,
+        **variables: str
+    ) -> KernelArguments:
+        """
+        Build the arguments for invoking a registered function.
+
+        Args:
+            function_name (str): The name of the function the arguments are for.
+            session_id (Optional[str]): A stable identifier of the calling user or session.
+            max_tokens (Optional[int]): Token limit of the response, if it differs from the function's.
+            **variables (str): The variables to render into the prompt.
+
+        Returns:
+            KernelArguments: The prompt variables and the writing style, with execution settings
+            that carry the session identifier and token limit when they are given.
+        """
+        # The content prompts open with the writing style
+        variables["personal_style"] = self.personal_style
+
+        if session_id is None and max_tokens is None:
+            return KernelArguments(**variables)
+
+        settings = _call_settings(self.service_id, self.use_azure, function_name, session_id, max_tokens)
+        return KernelArguments(settings=settings, **variables)
+
+    def _render_prompt(self, template: str, variables: Mapping[str, str]) -> str:
+        """Render a prompt template with the given variables, for requests sent outside the kernel."""
+        prompt = template
+        for name, value in variables.items():
+            prompt = prompt.replace(f"{{{{${name}}}}}", value)
+        return prompt
+
+    async def _run_batch(self, requests: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """Run chat completion requests as a Batch API job against the agent's service."""
+        url = "/chat/completions" if self.use_azure else "/v1/chat/completions"
+        return await run_chat_batch(self._openai_client, requests, url=url)
+
+    async def _invoke_cached(self, function: KernelFunction, arguments: KernelArguments) -> str:
+        """
+        Invoke a registered function, serving the result from the response cache when possible.
+
+        Args:
+            function (KernelFunction): The registered function to invoke.
+            arguments (KernelArguments): The arguments to render into the prompt.
+
+        Returns:
+            str: The generated (or cached) result.
+        """
+        cached, store = await self._cache_lookup(function, arguments)
+        if cached is not None:
+            return cached
+
+        async with self._limit():
+            result = _result_text(await self.kernel.invoke(function, arguments=arguments))
+
+        await store(result)
+        return result
+
+    async def _invoke_stream_cached(
+        self, function: KernelFunction, arguments: KernelArguments
+    ) -> AsyncIterator[str]:
+        """
+        Invoke a registered function and yield the result as it is generated.
+
+        A cached result is yielded as a single chunk; a generated result is stored in the
+        cache once the stream has completed.
+
+        Args:
+            function (KernelFunction): The registered function to invoke.
+            arguments (KernelArguments): The arguments to render into the prompt.
+
+        Yields:
+            str: Chunks of the generated (or cached) result.
+        """
+        cached, store = await self._cache_lookup(function, arguments)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        async with self._limit():
+            async for update in self.kernel.invoke_stream(function, arguments=arguments):
+                # Prompt functions stream a list with one message per choice
+                if not isinstance(update, list) or not update:
+                    continue
+                chunk = str(update[0])
+                if chunk:
+                    chunks.append(chunk)
+                    yield chunk
+
+        await store("".join(chunks))
+
+    async def _cache_lookup(
+        self, function: KernelFunction, arguments: KernelArguments
+    ) -> Tuple[Optional[str], Callable[[str], Awaitable[None]]]:
+        """
+        Look a request up in the response cache.
+
+        A request with the same function, model and variables (including the writing style)
+        as a previous one is served the previous result, also for sampled functions. Failing
+        that, the semantic tier returns a previous result for a request with a near-identical
+        topic and otherwise identical variables; analyses are only served on exact matches.
+
+        Args:
+            function (KernelFunction): The registered function to invoke.
+            arguments (KernelArguments): The arguments to render into the prompt.
+
+        Returns:
+            Tuple[Optional[str], Callable[[str], Awaitable[None]]]: The cached result, or None on a
+            miss, and a coroutine function that stores a newly generated result for the request.
+        """
+        if self._cache is None:
+            return None, _discard
+
+        prompt_vars = dict(arguments)
+        temperature = EXECUTION_SETTINGS[function.name]["temperature"]
+
+        # The prompt variables include the writing style, so results generated under a
+        # different style are not served, also when the cache is shared between agents
+        key = cache_key(self.model_id, {"function": function.name, **prompt_vars}, temperature)
+
+        # Only the free-text variable is compared semantically; a topic written for another
+        # audience, tone or length is a different request, so those select the namespace
+        semantic_variable = SEMANTIC_VARIABLES.get(function.name)
+        context = {name: value for name, value in prompt_vars.items() if name != semantic_variable}
+        namespace = cache_key(
+            self.model_id,
+            {"function": function.name, **context},
+            temperature
+        )
+        embedding = None
+
+        async def store(result: str) -> None:
+            await self._cache.set(key, result)
+            await self._cache.set_similar(namespace, embedding, result)
+
+        cached = await self._cache.get(key)
+        if cached is not None or semantic_variable is None:
+            return cached, store
+
+        # The embedding request counts against the concurrency limit like any other. The
+        # semantic tier is only an optimization, so if the request fails the lookup is a
+        # plain miss and the result is cached exactly only
+        try:
+            async with self._limit():
+                embedding = await self._cache.embed(str(prompt_vars.get(semantic_variable, "")))
+        except Exception:
+            return None, store
+        return await self._cache.get_similar(namespace, embedding), store
+
+    def _limit(self) -> asyncio.Semaphore:
+        """Return the semaphore bounding concurrent requests to the model service."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def aclose(self) -> None:
+        """
+        Release the agent's HTTP connections.
+
+        The connections are closed once no other open agent shares them.
+        """
+        if self._client_key is None:
+            return
+
+        # A closed agent must not be handed out by get_shared anymore
+        for key, agent in list(self._shared_instances.items()):
+            if agent is self:
+                del self._shared_instances[key]
+
+        client_key, self._client_key = self._client_key, None
+        self._client_users[client_key] -= 1
+        if self._client_users[client_key] == 0:
+            del self._client_users[client_key]
+            del self._shared_clients[client_key]
+            await self._http_client.aclose()
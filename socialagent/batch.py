@@ -0,0 +1,80 @@
+"""
+OpenAI Batch API support for the LinkedIn Content Generator Agent.
+
+Batch jobs are billed at a lower rate and use a separate rate-limit pool,
+at the cost of completing asynchronously within a 24 hour window.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict
+
+# Batch job states after which the job will not change anymore
+FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+async def run_chat_batch(
+    client: Any,
+    requests: Dict[str, Dict[str, Any]],
+    url: str = "/v1/chat/completions",
+    poll_interval: float = 5.0,
+    max_poll_interval: float = 300.0
+) -> Dict[str, str]:
+    """
+    Submit chat completion requests as a batch job and wait for the results.
+
+    Args:
+        client (Any): An AsyncOpenAI or AsyncAzureOpenAI client.
+        requests (Dict[str, Dict[str, Any]]): Chat completion request bodies by custom ID.
+        url (str): The endpoint the requests target ("/chat/completions" on Azure OpenAI).
+        poll_interval (float): Initial number of seconds between status checks.
+        max_poll_interval (float): Upper bound for the exponentially growing poll interval.
+
+    Returns:
+        Dict[str, str]: The completion text for each custom ID.
+    """
+    # The Batch API rejects a job without requests
+    if not requests:
+        return {}
+
+    # Build the JSONL input file, one request per line
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": url, "body": body})
+        for custom_id, body in requests.items()
+    ]
+    input_file = await client.files.create(
+        file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+        purpose="batch"
+    )
+
+    # Submit the job and poll with exponential backoff until it finishes
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=url,
+        completion_window="24h"
+    )
+    while batch.status not in FINAL_STATES:
+        await asyncio.sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, max_poll_interval)
+        batch = await client.batches.retrieve(batch.id)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch job {batch.id} finished with status '{batch.status}'.")
+
+    # Collect the results by custom ID
+    output = await client.files.content(batch.output_file_id)
+    results = {}
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+
+    missing = [custom_id for custom_id in requests if custom_id not in results]
+    if missing:
+        raise RuntimeError(f"Batch job {batch.id} returned no result for: {', '.join(missing)}")
+
+    return results
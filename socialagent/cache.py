@@ -0,0 +1,216 @@
+"""
+Response cache for the LinkedIn Content Generator Agent.
+
+Two tiers are supported: an exact tier keyed by a SHA-256 digest of the
+prompt variables, and an optional semantic tier that matches near-duplicate
+requests by cosine similarity of their embeddings.
+"""
+
+import hashlib
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+
+# Signature of the function used to turn text into an embedding vector
+Embedder = Callable[[str], Awaitable[Sequence[float]]]
+
+
+def cache_key(model: str, prompt_vars: Dict[str, Any], temperature: float) -> str:
+    """
+    Build a deterministic cache key for a completion request.
+
+    Args:
+        model (str): The model or service the completion is requested from.
+        prompt_vars (Dict[str, Any]): The variables rendered into the prompt.
+        temperature (float): The sampling temperature of the request.
+
+    Returns:
+        str: The hex SHA-256 digest identifying the request.
+    """
+    payload = json.dumps(
+        {"model": model, "prompt_vars": prompt_vars, "temperature": temperature},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(Protocol):
+    """Storage interface used by LLMCache for the exact-match tier."""
+
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    async def set(self, key: str, value: str) -> None:
+        ...
+
+    async def clear(self) -> None:
+        ...
+
+
+class MemoryBackend:
+    """
+    In-process cache backend with TTL and LRU eviction.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = 3600):
+        """
+        Initialize the memory backend.
+
+        Args:
+            maxsize (int): Maximum number of entries kept before the least recently used is evicted.
+            ttl (Optional[float]): Time to live of an entry in seconds. None disables expiry.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    """Scale a vector to unit length so a dot product equals cosine similarity."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return [0.0 for _ in vector]
+    return [x / norm for x in vector]
+
+
+class LLMCache:
+    """
+    Two-tier response cache for LLM completions.
+
+    The exact tier looks responses up by their cache key. The semantic tier,
+    enabled when an embedder is provided, returns the response of the most
+    similar previous request whose cosine similarity exceeds the threshold.
+    """
+
+    def __init__(self,
+                 backend: Optional[CacheBackend] = None,
+                 embedder: Optional[Embedder] = None,
+                 similarity_threshold: float = 0.95,
+                 max_semantic_entries: int = 512):
+        """
+        Initialize the LLM cache.
+
+        Args:
+            backend (Optional[CacheBackend]): Storage for the exact tier. Defaults to a MemoryBackend.
+            embedder (Optional[Embedder]): Async function returning the embedding of a text.
+                                           If not provided, the semantic tier is disabled.
+            similarity_threshold (float): Minimum cosine similarity for a semantic hit.
+            max_semantic_entries (int): Maximum number of entries kept in the semantic tier.
+        """
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.max_semantic_entries = max_semantic_entries
+        # Entries are indexed by namespace so a lookup only scans comparable requests;
+        # the insertion order of all entries is kept for evicting the oldest
+        self._semantic_entries: Dict[str, List[Tuple[List[float], str]]] = {}
+        self._semantic_order: "deque[str]" = deque()
+        # Embeddings of recently embedded texts, so repeated texts cost no embedding request
+        self._embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    @property
+    def semantic_enabled(self) -> bool:
+        """Whether the semantic tier is available."""
+        return self.embedder is not None
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the response stored under the exact key, if any."""
+        return await self.backend.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a response under the exact key."""
+        await self.backend.set(key, value)
+
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """Return the normalized embedding of a text, or None if the semantic tier is disabled."""
+        if self.embedder is None:
+            return None
+
+        embedding = self._embeddings.get(text)
+        if embedding is not None:
+            self._embeddings.move_to_end(text)
+            return embedding
+
+        embedding = _normalize(await self.embedder(text))
+        self._embeddings[text] = embedding
+        while len(self._embeddings) > self.max_semantic_entries:
+            self._embeddings.popitem(last=False)
+        return embedding
+
+    async def get_similar(self, namespace: str, embedding: Optional[List[float]]) -> Optional[str]:
+        """
+        Return the response of the most similar cached request.
+
+        Args:
+            namespace (str): Only entries stored under the same namespace are compared.
+            embedding (Optional[List[float]]): The normalized embedding of the request, as returned by embed().
+
+        Returns:
+            Optional[str]: The cached response, or None if nothing is similar enough.
+        """
+        if embedding is None:
+            return None
+
+        best_score = -1.0
+        best_value = None
+        for entry_embedding, value in self._semantic_entries.get(namespace, ()):
+            score = sum(a * b for a, b in zip(embedding, entry_embedding))
+            if score > best_score:
+                best_score, best_value = score, value
+
+        if best_score >= self.similarity_threshold:
+            return best_value
+        return None
+
+    async def set_similar(self, namespace: str, embedding: Optional[List[float]], value: str) -> None:
+        """
+        Store a response in the semantic tier.
+
+        Args:
+            namespace (str): The namespace to store the entry under.
+            embedding (Optional[List[float]]): The normalized embedding of the request, as returned by embed().
+            value (str): The response to cache.
+        """
+        if embedding is None:
+            return
+
+        self._semantic_entries.setdefault(namespace, []).append((embedding, value))
+        self._semantic_order.append(namespace)
+        if len(self._semantic_order) > self.max_semantic_entries:
+            oldest = self._semantic_order.popleft()
+            del self._semantic_entries[oldest][0]
+            if not self._semantic_entries[oldest]:
+                del self._semantic_entries[oldest]
+
+    async def clear(self) -> None:
+        """Remove all entries from both tiers."""
+        await self.backend.clear()
+        self._semantic_entries.clear()
+        self._semantic_order.clear()
+        self._embeddings.clear()
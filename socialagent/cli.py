@@ -6,53 +6,76 @@ import argparse
 import asyncio
 import os
 import sys
-from typing import Dict, List, Optional
+import uuid
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional
 
-from socialagent.agent import LinkedInContentAgent
+from socialagent import __version__, ensure_env_loaded
 
+if TYPE_CHECKING:
+    from pydantic import SecretStr
 
-async def generate_post(agent: LinkedInContentAgent, args: argparse.Namespace) -> None:
-    """Generate a LinkedIn post based on command line arguments."""
-    post = await agent.generate_linkedin_post(
+    from socialagent.agent import LinkedInContentAgent
+
+
+async def print_stream(chunks: AsyncIterator[str]) -> None:
+    """Print text chunks as they arrive, so output appears before the whole response is generated."""
+    # Piped or redirected output is not read as it arrives, so it is left to the normal buffering
+    flush = sys.stdout.isatty()
+    async for chunk in chunks:
+        print(chunk, end="", flush=flush)
+    print()
+
+
+async def generate_post(agent: "LinkedInContentAgent", args: argparse.Namespace) -> None:
+    """Generate a LinkedIn post based on command line arguments, printing it as it is generated."""
+    print("\n=== Generated LinkedIn Post ===\n")
+    await print_stream(agent.generate_linkedin_post_stream(
         topic=args.topic,
         audience=args.audience,
         tone=args.tone,
         include_hashtags=args.hashtags,
         length=args.length
-    )
-    
-    print("\n=== Generated LinkedIn Post ===\n")
-    print(post)
+    ))
     print("\n==============================\n")
 
 
-async def generate_series(agent: LinkedInContentAgent, args: argparse.Namespace) -> None:
+async def generate_series(agent: "LinkedInContentAgent", args: argparse.Namespace) -> None:
     """Generate a LinkedIn content series based on command line arguments."""
-    series = await agent.generate_content_series(
-        main_topic=args.topic,
-        number_of_posts=args.number,
-        audience=args.audience,
-        content_goal=args.goal
-    )
+    if args.write_posts:
+        series = await agent.generate_content_series_parallel(
+            main_topic=args.topic,
+            number_of_posts=args.number,
+            audience=args.audience,
+            content_goal=args.goal
+        )
+    else:
+        series = await agent.generate_content_series(
+            main_topic=args.topic,
+            number_of_posts=args.number,
+            audience=args.audience,
+            content_goal=args.goal,
+            use_batch_api=args.batch
+        )
     
     print("\n=== Generated Content Series ===\n")
     print(series)
     print("\n===============================\n")
 
 
-async def analyze_post(agent: LinkedInContentAgent, args: argparse.Namespace) -> None:
-    """Analyze a LinkedIn post based on command line arguments."""
-    analysis = await agent.analyze_post(post_content=args.content)
-    
+async def analyze_post(agent: "LinkedInContentAgent", args: argparse.Namespace) -> None:
+    """Analyze a LinkedIn post based on command line arguments, printing the analysis as it is generated."""
     print("\n=== Post Analysis ===\n")
-    print(analysis)
+    await print_stream(agent.analyze_post_stream(post_content=args.content))
     print("\n====================\n")
 
 
-async def interactive_mode(agent: LinkedInContentAgent) -> None:
+async def interactive_mode(agent: "LinkedInContentAgent") -> None:
     """Run the agent in interactive mode, prompting the user for input."""
     print("\n=== LinkedIn Content Generator Agent ===\n")
     print("Welcome to the LinkedIn Content Generator. What would you like to create today?\n")
+
+    # Identify the session so the service can route its requests to the same prompt cache
+    session_id = uuid.uuid4().hex
     
     while True:
         print("Options:")
@@ -61,91 +84,146 @@ async def interactive_mode(agent: LinkedInContentAgent) -> None:
         print("3. Analyze an existing post")
         print("4. Exit")
         
-        choice = input("\nEnter your choice (1-4): ")
-        
-        if choice == "1":
-            # Single post generation
-            topic = input("\nWhat topic would you like to write about? ")
-            audience = input("Who is your target audience? (default: professionals) ") or "professionals"
-            tone = input("What tone would you like? (professional, conversational, inspirational, etc.) (default: professional) ") or "professional"
-            hashtags = input("Include hashtags? (yes/no) (default: yes) ").lower() != "no"
-            length = input("Post length? (short, medium, long) (default: medium) ") or "medium"
-            
-            print("\nGenerating LinkedIn post...")
-            post = await agent.generate_linkedin_post(
-                topic=topic,
-                audience=audience,
-                tone=tone,
-                include_hashtags=hashtags,
-                length=length
-            )
-            
-            print("\n=== Generated LinkedIn Post ===\n")
-            print(post)
-            print("\n==============================\n")
-            
-        elif choice == "2":
-            # Content series generation
-            topic = input("\nWhat is the main topic for your content series? ")
-            number = int(input("How many posts would you like in the series? (default: 5) ") or "5")
-            audience = input("Who is your target audience? (default: professionals) ") or "professionals"
-            goal = input("What is your content goal? (e.g., establish thought leadership, drive engagement) (default: establish thought leadership) ") or "establish thought leadership"
-            
-            print("\nGenerating content series plan...")
-            series = await agent.generate_content_series(
-                main_topic=topic,
-                number_of_posts=number,
-                audience=audience,
-                content_goal=goal
-            )
-            
-            print("\n=== Generated Content Series ===\n")
-            print(series)
-            print("\n===============================\n")
-            
-        elif choice == "3":
-            # Post analysis
-            print("\nPaste the LinkedIn post you'd like to analyze (press Enter twice when done):")
-            lines = []
-            while True:
-                line = input()
-                if not line and lines and not lines[-1]:
-                    break
-                lines.append(line)
-            
-            content = "\n".join(lines[:-1])  # Remove the last empty line
-            
-            print("\nAnalyzing post...")
-            analysis = await agent.analyze_post(post_content=content)
-            
-            print("\n=== Post Analysis ===\n")
-            print(analysis)
-            print("\n====================\n")
-            
-        elif choice == "4":
+        # Input ends at end-of-file once a pasted post has been read, or when it is piped;
+        # that ends the session at whichever prompt it is reached
+        try:
+            choice = input("\nEnter your choice (1-4): ")
+
+            if choice == "1":
+                # Single post generation
+                topic = input("\nWhat topic would you like to write about? ")
+                audience = input("Who is your target audience? (default: professionals) ") or "professionals"
+                tone = input("What tone would you like? (professional, conversational, inspirational, etc.) (default: professional) ") or "professional"
+                hashtags = input("Include hashtags? (yes/no) (default: yes) ").lower() != "no"
+                length = input("Post length? (short, medium, long) (default: medium) ") or "medium"
+
+                print("\nGenerating LinkedIn post...")
+                print("\n=== Generated LinkedIn Post ===\n")
+                await print_stream(agent.generate_linkedin_post_stream(
+                    topic=topic,
+                    audience=audience,
+                    tone=tone,
+                    include_hashtags=hashtags,
+                    length=length,
+                    session_id=session_id
+                ))
+                print("\n==============================\n")
+
+            elif choice == "2":
+                # Content series generation
+                topic = input("\nWhat is the main topic for your content series? ")
+                number = int(input("How many posts would you like in the series? (default: 5) ") or "5")
+                if number < 1:
+                    print("\nA content series needs at least one post.\n")
+                    continue
+                audience = input("Who is your target audience? (default: professionals) ") or "professionals"
+                goal = input("What is your content goal? (e.g., establish thought leadership, drive engagement) (default: establish thought leadership) ") or "establish thought leadership"
+
+                print("\nGenerating content series plan...")
+                series = await agent.generate_content_series(
+                    main_topic=topic,
+                    number_of_posts=number,
+                    audience=audience,
+                    content_goal=goal,
+                    session_id=session_id
+                )
+
+                print("\n=== Generated Content Series ===\n")
+                print(series)
+                print("\n===============================\n")
+
+            elif choice == "3":
+                # Post analysis
+                # Read the whole paste at once; ending it at end-of-file rather than at an empty line
+                # keeps posts with any number of blank lines intact
+                eof_key = "Ctrl-Z then Enter" if sys.platform == "win32" else "Ctrl-D"
+                print(f"\nPaste the LinkedIn post you'd like to analyze (press {eof_key} on a new line when done):")
+                content = sys.stdin.read().rstrip()
+
+                print("\nAnalyzing post...")
+                print("\n=== Post Analysis ===\n")
+                await print_stream(agent.analyze_post_stream(post_content=content, session_id=session_id))
+                print("\n====================\n")
+
+            elif choice != "4":
+                print("\nInvalid choice. Please enter a number between 1 and 4.\n")
+        except EOFError:
+            choice = "4"
+
+        if choice == "4":
             print("\nThank you for using the LinkedIn Content Generator. Goodbye!")
             break
-            
-        else:
-            print("\nInvalid choice. Please enter a number between 1 and 4.\n")
 
 
-async def main(args: Optional[List[str]] = None) -> None:
-    """Main entry point for the CLI."""
-    # Add debug output to show if environment variables are loaded
-    print("Initializing LinkedIn Content Generator...")
+async def full_pipeline(agent: "LinkedInContentAgent") -> None:
+    """Run a demo of the full pipeline - for testing."""
+    print("=== LinkedIn Content Generator Full Pipeline Demo ===\n")
+
+    # Identify the run so the service can route its requests to the same prompt cache
+    session_id = uuid.uuid4().hex
     
-    # Debug output for environment variables
-    if os.environ.get("AZURE_OPENAI_API_KEY"):
-        print("Debug: AZURE_OPENAI_API_KEY is set in environment variables")
-    if os.environ.get("AZURE_OPENAI_ENDPOINT"):
-        print("Debug: AZURE_OPENAI_ENDPOINT is set in environment variables")
-    if os.environ.get("AZURE_OPENAI_DEPLOYMENT"):
-        print("Debug: AZURE_OPENAI_DEPLOYMENT is set in environment variables")
-    if os.environ.get("AZURE_OPENAI_MODEL"):
-        print("Debug: AZURE_OPENAI_MODEL is set in environment variables")
+    # The content series does not depend on the post, so it is generated while the
+    # post is written and analyzed
+    print("Generating a post about AI in the workplace, its analysis and a content series on AI in business...\n")
+    [(post, analysis)], series = await agent.gather(
+        agent.generate_and_analyze(
+            topics=["The impact of AI on workplace productivity"],
+            audience="business professionals",
+            tone="informative",
+            include_hashtags=True,
+            length="medium",
+            session_id=session_id
+        ),
+        agent.generate_content_series(
+            main_topic="Implementing AI in Business Operations",
+            number_of_posts=3,
+            audience="business leaders and decision makers",
+            content_goal="provide practical insights for AI adoption",
+            session_id=session_id
+        )
+    )
+
+    # 1. The post about AI
+    print(f"1. Generated Post:\n{post}\n\n")
     
+    # 2. The analysis of the post
+    print(f"2. Post Analysis:\n{analysis}\n\n")
+    
+    # 3. The content series
+    print(f"3. Content Series Plan:\n{series}\n\n")
+    
+    print("=== Demo Complete ===")
+
+
+def _positive_int(value: str) -> int:
+    """Parse a command line value that must be a whole number of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _secret(value: "Optional[SecretStr]") -> str:
+    """Return the value of an optional secret setting, or an empty string if it is not set."""
+    return value.get_secret_value() if value is not None else ""
+
+
+async def read_style_file(path: str) -> str:
+    """Read a personal style file in a worker thread, so a slow (e.g. network) file system does not block the event loop."""
+    def read() -> str:
+        with open(path, 'r') as f:
+            return f.read().strip()
+
+    return await asyncio.get_running_loop().run_in_executor(None, read)
+
+
+async def main(args: Optional[List[str]] = None) -> None:
+    """Main entry point for the CLI."""
     parser = argparse.ArgumentParser(description="LinkedIn Content Generator Agent")
+    parser.add_argument("--version", action="version", version=f"socialagent {__version__}")
     
     # API configuration arguments
     parser.add_argument("--use-azure", action="store_true", default=True, help="Use Azure OpenAI (default: True)")
@@ -174,9 +252,13 @@ async def main(args: Optional[List[str]] = None) -> None:
     # Parser for generating a content series
     series_parser = subparsers.add_parser("series", help="Generate a LinkedIn content series plan")
     series_parser.add_argument("--topic", required=True, help="The main topic of the content series")
-    series_parser.add_argument("--number", type=int, default=5, help="Number of posts in the series (default: 5)")
+    series_parser.add_argument("--number", type=_positive_int, default=5, help="Number of posts in the series (default: 5)")
     series_parser.add_argument("--audience", default="professionals", help="Target audience (default: professionals)")
     series_parser.add_argument("--goal", default="establish thought leadership", help="Content goal (default: establish thought leadership)")
+    # Batch submission and parallel post writing are separate ways of running the series
+    series_mode = series_parser.add_mutually_exclusive_group()
+    series_mode.add_argument("--batch", action="store_true", help="Submit through the Batch API at half the cost (results may take up to 24 hours)")
+    series_mode.add_argument("--write-posts", action="store_true", help="Write every post of the series, generating the posts in parallel")
     
     # Parser for analyzing a post
     analyze_parser = subparsers.add_parser("analyze", help="Analyze a LinkedIn post")
@@ -189,21 +271,35 @@ async def main(args: Optional[List[str]] = None) -> None:
     subparsers.add_parser("full-pipeline", help="Run a full pipeline demo")
     
     parsed_args = parser.parse_args(args)
+
+    # Load the .env file only once the arguments are valid, so --help and --version stay fast
+    print("Initializing LinkedIn Content Generator...")
+    ensure_env_loaded()
+    
+    # Debug output for environment variables
+    if os.environ.get("AZURE_OPENAI_API_KEY"):
+        print("Debug: AZURE_OPENAI_API_KEY is set in environment variables")
+    if os.environ.get("AZURE_OPENAI_ENDPOINT"):
+        print("Debug: AZURE_OPENAI_ENDPOINT is set in environment variables")
+    if os.environ.get("AZURE_OPENAI_DEPLOYMENT"):
+        print("Debug: AZURE_OPENAI_DEPLOYMENT is set in environment variables")
+    if os.environ.get("AZURE_OPENAI_MODEL"):
+        print("Debug: AZURE_OPENAI_MODEL is set in environment variables")
     
     # Determine whether to use Azure OpenAI or direct OpenAI
     use_azure = parsed_args.use_azure
     
-    # Get API configuration
+    # Get API configuration, falling back to the settings read once from the environment
+    from socialagent.config import get_settings, unquote
+
+    settings = get_settings()
     if use_azure:
-        api_key = parsed_args.azure_api_key or os.environ.get("AZURE_OPENAI_API_KEY")
-        # Strip any quotes that might be in the environment variable
-        if api_key and (api_key.startswith('"') and api_key.endswith('"') or 
-                        api_key.startswith("'") and api_key.endswith("'")):
-            api_key = api_key[1:-1]
+        # Strip any quotes that might be in the argument
+        api_key = unquote(parsed_args.azure_api_key or _secret(settings.azure_openai_api_key))
             
-        model_id = parsed_args.azure_model or os.environ.get("AZURE_OPENAI_MODEL")
-        azure_endpoint = parsed_args.azure_endpoint or os.environ.get("AZURE_OPENAI_ENDPOINT")
-        azure_deployment = parsed_args.azure_deployment or os.environ.get("AZURE_OPENAI_DEPLOYMENT")
+        model_id = parsed_args.azure_model or settings.azure_openai_model
+        azure_endpoint = parsed_args.azure_endpoint or settings.azure_openai_endpoint
+        azure_deployment = parsed_args.azure_deployment or settings.azure_openai_deployment
         
         if not api_key:
             print("Error: Azure OpenAI API key is required. Provide it with --azure-api-key or set the AZURE_OPENAI_API_KEY environment variable.")
@@ -213,25 +309,26 @@ async def main(args: Optional[List[str]] = None) -> None:
             print("Error: Azure OpenAI endpoint URL is required. Provide it with --azure-endpoint or set the AZURE_OPENAI_ENDPOINT environment variable.")
             sys.exit(1)
     else:
-        api_key = parsed_args.openai_api_key or os.environ.get("OPENAI_API_KEY")
-        model_id = parsed_args.openai_model or os.environ.get("OPENAI_MODEL", "gpt-4")
+        api_key = parsed_args.openai_api_key or _secret(settings.openai_api_key)
+        model_id = parsed_args.openai_model or settings.openai_model or "gpt-4"
         
         if not api_key:
             print("Error: OpenAI API key is required. Provide it with --openai-api-key or set the OPENAI_API_KEY environment variable.")
             sys.exit(1)
     
     # Get personal style configuration
-    personal_style = parsed_args.personal_style or os.environ.get("PERSONAL_STYLE")
+    personal_style = parsed_args.personal_style or settings.personal_style
     
     # If a style file is provided, read the style from the file
     if parsed_args.style_file and os.path.exists(parsed_args.style_file):
         try:
-            with open(parsed_args.style_file, 'r') as f:
-                personal_style = f.read().strip()
+            personal_style = await read_style_file(parsed_args.style_file)
         except Exception as e:
             print(f"Warning: Could not read style file: {e}")
     
-    # Initialize the agent
+    # Initialize the agent (imported here so --help and --version do not load Semantic Kernel)
+    from socialagent.agent import LinkedInContentAgent
+
     try:
         if use_azure:
             agent = LinkedInContentAgent(
@@ -253,55 +350,52 @@ async def main(args: Optional[List[str]] = None) -> None:
         print(f"Error initializing agent: {e}")
         sys.exit(1)
     
-    # Execute the requested action
-    if parsed_args.action == "post":
-        await generate_post(agent, parsed_args)
-    elif parsed_args.action == "series":
-        await generate_series(agent, parsed_args)
-    elif parsed_args.action == "analyze":
-        await analyze_post(agent, parsed_args)
-    elif parsed_args.action == "interactive":
-        await interactive_mode(agent)
-    elif parsed_args.action == "full-pipeline":
-        # Demo the full pipeline - for testing
-        print("=== LinkedIn Content Generator Full Pipeline Demo ===\n")
-        
-        # 1. Generate a post about AI
-        print("1. Generating a post about AI in the workplace...\n")
-        post = await agent.generate_linkedin_post(
-            topic="The impact of AI on workplace productivity",
-            audience="business professionals",
-            tone="informative",
-            include_hashtags=True,
-            length="medium"
-        )
-        print(f"Generated Post:\n{post}\n\n")
-        
-        # 2. Analyze the post
-        print("2. Analyzing the generated post...\n")
-        analysis = await agent.analyze_post(post_content=post)
-        print(f"Post Analysis:\n{analysis}\n\n")
-        
-        # 3. Generate a content series
-        print("3. Generating a content series on AI in business...\n")
-        series = await agent.generate_content_series(
-            main_topic="Implementing AI in Business Operations",
-            number_of_posts=3,
-            audience="business leaders and decision makers",
-            content_goal="provide practical insights for AI adoption"
-        )
-        print(f"Content Series Plan:\n{series}\n\n")
-        
-        print("=== Demo Complete ===")
+    # Execute the requested action, closing the agent's connections afterwards
+    try:
+        if parsed_args.action == "post":
+            await generate_post(agent, parsed_args)
+        elif parsed_args.action == "series":
+            await generate_series(agent, parsed_args)
+        elif parsed_args.action == "analyze":
+            await analyze_post(agent, parsed_args)
+        elif parsed_args.action == "interactive":
+            await interactive_mode(agent)
+        elif parsed_args.action == "full-pipeline":
+            await full_pipeline(agent)
+        else:
+            # Default to interactive mode if no action specified
+            await interactive_mode(agent)
+    finally:
+        await agent.aclose()
+
+
+def run(args: Optional[List[str]] = None) -> None:
+    """Run the CLI on uvloop where it is installed, otherwise on asyncio's default event loop."""
+    try:
+        import uvloop
+    except ImportError:
+        runner, new_event_loop = asyncio.run, asyncio.new_event_loop
     else:
-        # Default to interactive mode if no action specified
-        await interactive_mode(agent)
+        runner, new_event_loop = uvloop.run, uvloop.new_event_loop
+
+    if not hasattr(asyncio, "eager_task_factory"):
+        runner(main(args))
+        return
+
+    # Start tasks eagerly where supported (Python 3.12+), so calls served from the cache
+    # complete without waiting for a turn of the event loop
+    def loop_factory() -> asyncio.AbstractEventLoop:
+        loop = new_event_loop()
+        loop.set_task_factory(asyncio.eager_task_factory)
+        return loop
+
+    runner(main(args), loop_factory=loop_factory)
 
 
 def cli_entry_point() -> None:
     """Entry point for the installed CLI script."""
-    asyncio.run(main())
+    run()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
@@ -0,0 +1,62 @@
+"""
+Configuration for the LinkedIn Content Generator Agent.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import Field, SecretStr, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from socialagent import ensure_env_loaded
+
+
+def unquote(value: str) -> str:
+    """Remove one pair of matching quotes wrapping a value, as some shells and .env editors leave them."""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+        return value[1:-1]
+    return value
+
+
+class Settings(BaseSettings):
+    """
+    Settings read from environment variables (and the .env file).
+
+    Values are unquoted during validation.
+    """
+
+    model_config = SettingsConfigDict(extra="ignore")
+
+    # Azure OpenAI configuration
+    azure_openai_api_key: Optional[SecretStr] = None
+    azure_openai_endpoint: Optional[str] = None
+    azure_openai_deployment: Optional[str] = None
+    azure_openai_model: Optional[str] = None
+    azure_openai_embedding_deployment: Optional[str] = None
+
+    # OpenAI configuration
+    openai_api_key: Optional[SecretStr] = None
+    openai_model: Optional[str] = None
+    openai_embedding_model: Optional[str] = None
+
+    # Writing style
+    personal_style: Optional[str] = None
+
+    # Maximum number of concurrent requests to the model service
+    socialagent_max_concurrency: Optional[int] = Field(default=None, ge=1)
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _strip_quotes(cls, value):
+        return unquote(value) if isinstance(value, str) else value
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Return the settings, reading the environment only on the first call.
+
+    Call get_settings.cache_clear() to pick up changes made to the environment afterwards.
+    """
+    ensure_env_loaded()
+    return Settings()
@@ -10,17 +10,35 @@ import asyncio
 
 class TestLinkedInContentAgent(unittest.TestCase):
     """Tests for the LinkedInContentAgent class."""
+
+    def setUp(self):
+        """Re-read the settings so environment changes made by a test are picked up."""
+        from socialagent.config import get_settings
+        get_settings.cache_clear()
+        self._agents = []
+
+    def tearDown(self):
+        """Close the agents created by the test, releasing their shared connections."""
+        for agent in self._agents:
+            asyncio.run(agent.aclose())
+
+    def _agent(self, **kwargs):
+        """Create an OpenAI agent that is closed when the test ends."""
+        from socialagent.agent import LinkedInContentAgent
+
+        agent = LinkedInContentAgent(use_azure=False, **kwargs)
+        self._agents.append(agent)
+        return agent
     
     @patch('semantic_kernel.Kernel')
     def test_agent_initialization(self, mock_kernel):
         """Test that the agent initializes correctly."""
-        from socialagent.agent import LinkedInContentAgent
         
         # Setup
         os.environ["OPENAI_API_KEY"] = "test-api-key"
         
         # Execute
-        agent = LinkedInContentAgent()
+        agent = self._agent()
         
         # Assert
         self.assertIsNotNone(agent)
@@ -30,17 +48,16 @@ class TestLinkedInContentAgent(unittest.TestCase):
     @patch('semantic_kernel.functions.KernelFunction')
     def test_generate_linkedin_post(self, mock_function, mock_kernel):
         """Test generating a LinkedIn post."""
-        from socialagent.agent import LinkedInContentAgent
         
         # Setup
         os.environ["OPENAI_API_KEY"] = "test-api-key"
         
         mock_kernel_instance = mock_kernel.return_value
-        mock_kernel_instance.functions.get_function.return_value = MagicMock()
+        mock_kernel_instance.add_plugin.side_effect = lambda plugin: plugin
         mock_kernel_instance.invoke = AsyncMock(return_value="Generated LinkedIn post")
         
         # Execute
-        agent = LinkedInContentAgent()
+        agent = self._agent()
         
         # Run the async function in the test
         result = asyncio.run(agent.generate_linkedin_post(
@@ -53,10 +70,356 @@ class TestLinkedInContentAgent(unittest.TestCase):
         
         # Assert
         self.assertEqual(result, "Generated LinkedIn post")
-        mock_kernel_instance.functions.get_function.assert_called_once_with(
-            "linkedin_content", "generate_linkedin_post"
+        mock_kernel_instance.get_plugin.assert_not_called()
+        invoked_function = mock_kernel_instance.invoke.call_args.args[0]
+        self.assertIs(invoked_function, agent._fn_post)
+        self.assertEqual(list(agent._plugin.functions), ["generate_linkedin_post"])
+
+    @patch('semantic_kernel.Kernel')
+    def test_generate_linkedin_post_stream(self, mock_kernel):
+        """Test streaming a LinkedIn post and serving the repeat from the cache."""
+        from socialagent.cache import LLMCache
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        async def invoke_stream(function, arguments):
+            for chunk in ["Generated ", "LinkedIn ", "post"]:
+                yield [chunk]
+
+        async def embedder(text):
+            return [1.0, 0.0]
+
+        mock_kernel_instance = mock_kernel.return_value
+        mock_kernel_instance.add_plugin.side_effect = lambda plugin: plugin
+        mock_kernel_instance.invoke_stream = MagicMock(side_effect=invoke_stream)
+
+        # Execute
+        agent = self._agent(cache=LLMCache(embedder=embedder))
+
+        async def collect():
+            return [chunk async for chunk in agent.generate_linkedin_post_stream(topic="Test topic")]
+
+        first = asyncio.run(collect())
+        second = asyncio.run(collect())
+
+        # Assert
+        self.assertEqual(first, ["Generated ", "LinkedIn ", "post"])
+        self.assertEqual(second, ["Generated LinkedIn post"])
+        mock_kernel_instance.invoke_stream.assert_called_once()
+
+    @patch('semantic_kernel.Kernel')
+    def test_cache_is_scoped_to_request_context(self, mock_kernel):
+        """Test that the cache does not serve results generated for another style or audience."""
+        from socialagent.cache import LLMCache
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        async def embedder(text):
+            return [1.0, 0.0]
+
+        mock_kernel_instance = mock_kernel.return_value
+        mock_kernel_instance.add_plugin.side_effect = lambda plugin: plugin
+        mock_kernel_instance.invoke = AsyncMock(return_value="Generated LinkedIn post")
+
+        # Execute
+        cache = LLMCache(embedder=embedder)
+        formal = self._agent(personal_style="Formal", cache=cache)
+        casual = self._agent(personal_style="Casual", cache=cache)
+        uncached = self._agent(personal_style="Formal", enable_cache=False)
+
+        for agent in (formal, formal, casual, uncached):
+            asyncio.run(agent.generate_linkedin_post(topic="Test topic"))
+        asyncio.run(formal.generate_linkedin_post(topic="Test topic", audience="Engineers"))
+
+        # Assert
+        self.assertEqual(mock_kernel_instance.invoke.call_count, 4)
+
+    @patch('semantic_kernel.Kernel')
+    def test_repeated_request_is_served_from_exact_cache(self, mock_kernel):
+        """Test that an identical sampled request is served from the cache without an embedder."""
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        mock_kernel_instance = mock_kernel.return_value
+        mock_kernel_instance.add_plugin.side_effect = lambda plugin: plugin
+        mock_kernel_instance.invoke = AsyncMock(return_value="Generated analysis")
+
+        # Execute
+        agent = self._agent()
+        results = [asyncio.run(agent.analyze_post(post_content="My post")) for _ in range(2)]
+
+        # Assert
+        self.assertEqual(results, ["Generated analysis", "Generated analysis"])
+        mock_kernel_instance.invoke.assert_called_once()
+
+    @patch('semantic_kernel.Kernel')
+    def test_edited_post_is_analyzed_anew(self, mock_kernel):
+        """Test that an analysis is not served from the semantic tier for a similar post."""
+        from socialagent.cache import LLMCache
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        async def embedder(text):
+            return [1.0, 0.0]
+
+        mock_kernel_instance = mock_kernel.return_value
+        mock_kernel_instance.add_plugin.side_effect = lambda plugin: plugin
+        mock_kernel_instance.invoke = AsyncMock(return_value="Generated analysis")
+
+        # Execute
+        agent = self._agent(cache=LLMCache(embedder=embedder))
+        for post in ("My first draft", "My second draft"):
+            asyncio.run(agent.analyze_post(post_content=post))
+
+        # Assert
+        self.assertEqual(mock_kernel_instance.invoke.call_count, 2)
+
+    @patch('semantic_kernel.Kernel')
+    def test_embedding_failure_falls_back_to_generation(self, mock_kernel):
+        """Test that a failing embedding request does not fail the post it was made for."""
+        from socialagent.cache import LLMCache
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        async def embedder(text):
+            raise RuntimeError("Embedding deployment not found")
+
+        mock_kernel_instance = mock_kernel.return_value
+        mock_kernel_instance.add_plugin.side_effect = lambda plugin: plugin
+        mock_kernel_instance.invoke = AsyncMock(return_value="Generated LinkedIn post")
+
+        # Execute
+        agent = self._agent(cache=LLMCache(embedder=embedder))
+        results = [asyncio.run(agent.generate_linkedin_post(topic="Test topic")) for _ in range(2)]
+
+        # Assert
+        self.assertEqual(results, ["Generated LinkedIn post", "Generated LinkedIn post"])
+        mock_kernel_instance.invoke.assert_called_once()
+
+    @patch('semantic_kernel.Kernel')
+    def test_generate_content_series_parallel(self, mock_kernel):
+        """Test that a post is written for each requested headline of the streamed series outline."""
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        async def invoke_stream(function, arguments):
+            for chunk in ['```json\n["First head', 'line", "Second', ' headline", "Third headline"]', '\n```']:
+                yield [chunk]
+
+        async def invoke(function, arguments):
+            return f"Post about {arguments['topic'].split(' (')[0]}"
+
+        mock_kernel_instance = mock_kernel.return_value
+        mock_kernel_instance.add_plugin.side_effect = lambda plugin: plugin
+        mock_kernel_instance.invoke_stream = MagicMock(side_effect=invoke_stream)
+        mock_kernel_instance.invoke = AsyncMock(side_effect=invoke)
+
+        # Execute
+        agent = self._agent()
+        series = asyncio.run(agent.generate_content_series_parallel(main_topic="AI", number_of_posts=2))
+
+        # Assert
+        self.assertEqual(series, (
+            "Post 1: First headline\nPost about First headline\n\n"
+            "Post 2: Second headline\nPost about Second headline"
+        ))
+        self.assertEqual(mock_kernel_instance.invoke.call_count, 2)
+
+    @patch('semantic_kernel.Kernel')
+    def test_content_series_requires_posts(self, mock_kernel):
+        """Test that a content series of no posts is rejected before any request is made."""
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+        mock_kernel_instance = mock_kernel.return_value
+        mock_kernel_instance.add_plugin.side_effect = lambda plugin: plugin
+        mock_kernel_instance.invoke = AsyncMock(return_value="Series")
+
+        # Execute / Assert
+        agent = self._agent()
+        for use_batch_api in (False, True):
+            with self.assertRaises(ValueError):
+                asyncio.run(agent.generate_content_series(
+                    main_topic="AI", number_of_posts=0, use_batch_api=use_batch_api
+                ))
+        mock_kernel_instance.invoke.assert_not_called()
+
+    def test_gather_cancels_pending_calls_on_failure(self):
+        """Test that the remaining calls are cancelled when one of the gathered calls fails."""
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+        agent = self._agent()
+
+        async def fail():
+            raise RuntimeError("Service unavailable")
+
+        async def run():
+            slow = asyncio.ensure_future(asyncio.sleep(60))
+            with self.assertRaises(RuntimeError):
+                await agent.gather(fail(), slow)
+            await asyncio.sleep(0)
+            return slow.cancelled()
+
+        # Execute
+        cancelled = asyncio.run(run())
+
+        # Assert
+        self.assertTrue(cancelled)
+
+    @patch('semantic_kernel.Kernel')
+    def test_generate_linkedin_posts_batch(self, mock_kernel):
+        """Test that one Batch API request is submitted per topic, from the post prompt."""
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        # Execute
+        agent = self._agent(personal_style="Formal")
+        with patch("socialagent.agent.run_chat_batch", new=AsyncMock(
+            return_value={"post_0": "First post", "post_1": "Second post"}
+        )) as mock_batch:
+            posts = asyncio.run(agent.generate_linkedin_posts_batch(["AI", "Cloud"], length="short"))
+
+        # Assert
+        self.assertEqual(posts, ["First post", "Second post"])
+        requests = mock_batch.call_args.args[1]
+        prompt = requests["post_1"]["messages"][0]["content"]
+        self.assertIn("Topic: Cloud", prompt)
+        self.assertIn("Formal", prompt)
+        self.assertNotIn("{{$", prompt)
+        self.assertEqual(requests["post_1"]["max_tokens"], 300)
+
+    @patch('semantic_kernel.Kernel')
+    def test_max_concurrency_must_be_positive(self, mock_kernel):
+        """Test that a concurrency limit below 1 is rejected rather than replaced."""
+        from pydantic import ValidationError
+
+        from socialagent.config import get_settings
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        # Execute / Assert
+        with self.assertRaises(ValueError):
+            self._agent(max_concurrency=0)
+        with patch.dict(os.environ, {"SOCIALAGENT_MAX_CONCURRENCY": "-1"}):
+            get_settings.cache_clear()
+            with self.assertRaises(ValidationError):
+                get_settings()
+        get_settings.cache_clear()
+
+    @patch('semantic_kernel.Kernel')
+    def test_agents_share_connections(self, mock_kernel):
+        """Test that agents for the same service share one HTTP client until the last one closes."""
+
+        # Setup
+        os.environ["OPENAI_API_KEY"] = "test-api-key"
+
+        # Execute
+        first = self._agent(api_key="shared-key", personal_style="Formal")
+        second = self._agent(api_key="shared-key", personal_style="Casual")
+
+        # Assert
+        self.assertIs(first._openai_client, second._openai_client)
+        asyncio.run(first.aclose())
+        self.assertFalse(second._http_client.is_closed)
+        asyncio.run(second.aclose())
+        self.assertTrue(second._http_client.is_closed)
+
+
+class TestLLMCache(unittest.TestCase):
+    """Tests for the LLMCache class."""
+
+    def test_exact_tier(self):
+        """Test that responses are returned for an identical cache key only."""
+        from socialagent.cache import LLMCache, cache_key
+
+        cache = LLMCache()
+        key = cache_key("gpt-4", {"topic": "AI"}, 0)
+
+        asyncio.run(cache.set(key, "cached response"))
+
+        self.assertEqual(asyncio.run(cache.get(key)), "cached response")
+        self.assertIsNone(asyncio.run(cache.get(cache_key("gpt-4", {"topic": "Cloud"}, 0))))
+
+    def test_semantic_tier(self):
+        """Test that near-duplicate requests are served from the semantic tier."""
+        from socialagent.cache import LLMCache
+
+        vectors = {"AI at work": [1.0, 0.0], "Workplace AI": [0.99, 0.01], "Cooking": [0.0, 1.0]}
+
+        async def embedder(text):
+            return vectors[text]
+
+        async def run():
+            cache = LLMCache(embedder=embedder)
+            await cache.set_similar("post", await cache.embed("AI at work"), "cached post")
+            return (
+                await cache.get_similar("post", await cache.embed("Workplace AI")),
+                await cache.get_similar("post", await cache.embed("Cooking")),
+                await cache.get_similar("analysis", await cache.embed("Workplace AI")),
+            )
+
+        self.assertEqual(asyncio.run(run()), ("cached post", None, None))
+
+    def test_embeddings_are_reused(self):
+        """Test that a text is embedded only once."""
+        from socialagent.cache import LLMCache
+
+        embedder = AsyncMock(return_value=[3.0, 4.0])
+
+        async def run():
+            cache = LLMCache(embedder=embedder)
+            return [await cache.embed("AI at work") for _ in range(2)]
+
+        self.assertEqual(asyncio.run(run()), [[0.6, 0.8], [0.6, 0.8]])
+        embedder.assert_awaited_once_with("AI at work")
+
+
+class TestRunChatBatch(unittest.TestCase):
+    """Tests for the Batch API helper."""
+
+    def test_results_by_custom_id(self):
+        """Test that batch output is collected by custom ID once the job completes."""
+        import json
+        from socialagent.batch import run_chat_batch
+
+        def record(custom_id, content):
+            body = {"choices": [{"message": {"content": content}}]}
+            return json.dumps({"custom_id": custom_id, "response": {"status_code": 200, "body": body}})
+
+        client = MagicMock()
+        client.files.create = AsyncMock(return_value=MagicMock(id="file-in"))
+        client.batches.create = AsyncMock(return_value=MagicMock(id="batch-1", status="in_progress"))
+        client.batches.retrieve = AsyncMock(
+            return_value=MagicMock(id="batch-1", status="completed", output_file_id="file-out")
+        )
+        client.files.content = AsyncMock(
+            return_value=MagicMock(text="\n".join([record("post_2", "Second"), record("post_1", "First")]))
         )
 
+        results = asyncio.run(run_chat_batch(
+            client, {"post_1": {}, "post_2": {}}, poll_interval=0
+        ))
+
+        self.assertEqual(results, {"post_1": "First", "post_2": "Second"})
+        client.batches.retrieve.assert_called_once_with("batch-1")
+
+    def test_no_requests(self):
+        """Test that no batch job is created when there is nothing to submit."""
+        from socialagent.batch import run_chat_batch
+
+        client = MagicMock()
+        client.files.create = AsyncMock()
+
+        self.assertEqual(asyncio.run(run_chat_batch(client, {})), {})
+        client.files.create.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()